@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import argparse
+import threading
+import time
+from pathlib import Path
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # Shared profiling.py, ratelimit.py
+import profiling
+from profiling import phase
+from ratelimit import BATCH
+from main import get_completion_from_messages, get_current_weather
+
+SYSTEM_PROMPT = "You are a helpful AI assistant."
+
+
+class WeatherCache:
+    """
+    Shares `get_current_weather` lookups across the whole batch.
+
+    Identical locations (case/whitespace-insensitive) asked concurrently wait
+    for one in-flight request; finished results are kept in a bounded LRU for
+    `max_age` seconds, so an overnight run never reports stale "current" weather.
+    Errors are shared with concurrent callers but not cached.
+    """
+
+    def __init__(self, max_entries=10_000, max_age=15 * 60):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.entries = OrderedDict()  # key → (Future, fetch start time)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_current_weather(self, location: str):
+        key = " ".join(location.lower().split())
+
+        with self.lock:
+            now = time.monotonic()
+            entry = self.entries.get(key)
+            if entry is not None and entry[0].done() and now - entry[1] > self.max_age:
+                # Expired: fetch again (in-flight lookups are always shared)
+                del self.entries[key]
+                entry = None
+
+            if entry is not None:
+                future = entry[0]
+                self.entries.move_to_end(key)
+                self.hits += 1
+                owner = False
+            else:
+                future = Future()
+                self.entries[key] = (future, now)
+                self.misses += 1
+                if len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = get_current_weather(location)
+        except Exception as e:
+            result = {"query": location, "error": "lookup_error", "detail": str(e)}
+
+        if "error" in result:
+            with self.lock:
+                if self.entries.get(key, (None,))[0] is future:
+                    del self.entries[key]
+        future.set_result(result)
+        return result
+
+
+def read_questions(path, offset):
+    """Yield (raw JSON line, byte offset after the line) starting at `offset`."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            offset += len(line)
+            if not line.strip():
+                continue
+            yield line, offset
+
+
+def answer_question(line, cache, model):
+    """
+    Answer one input line. Malformed lines and failed calls become
+    {"id", "error"} results, so one bad record does not stop the batch.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return {"id": None, "error": f"invalid_json: {e}"}
+    if not isinstance(record, dict):
+        return {"id": None, "error": "invalid_record: expected a JSON object"}
+    if not isinstance(record.get("question"), str):
+        return {"id": record.get("id"), "error": "invalid_record: missing question"}
+
+    try:
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": record["question"]},
+        ]
+        response = get_completion_from_messages(
+            messages,
+            model=model,
+            priority=BATCH,
+            functions={"get_current_weather": cache.get_current_weather},
+            verbose=False,
+        )
+        return {"id": record.get("id"), "question": record["question"], "answer": response.content}
+    except Exception as e:
+        return {"id": record.get("id"), "question": record["question"], "error": str(e)}
+
+
+def load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"input_offset": 0, "output_offset": 0, "processed": 0}
+
+
+def save_checkpoint(path, checkpoint):
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def run_batch(
+    input_path,
+    output_path,
+    model="gpt-4o",
+    concurrency=8,
+    checkpoint_path=None,
+    checkpoint_every=20
+):
+    """
+    Answer a JSONL file of questions into a JSONL file of answers.
+
+    Questions are streamed and at most `2 * concurrency` are in flight, so
+    memory stays flat. Answers are written in input order; the checkpoint
+    stores the input/output byte offsets of the last written answer, and a
+    rerun resumes from there.
+
+    Args:
+        input_path: JSONL with {"id": ..., "question": ...} per line
+        output_path: JSONL with {"id", "question", "answer" or "error"} per line
+        model: OpenAI model
+        concurrency: Parallel model calls
+        checkpoint_path: Progress file (default: `<output_path>.checkpoint`)
+        checkpoint_every: Answers written between checkpoint saves
+    """
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    checkpoint = load_checkpoint(checkpoint_path)
+    cache = WeatherCache()
+
+    if checkpoint["processed"]:
+        print(f"Resuming after {checkpoint['processed']} answered questions")
+
+    # Drop answers written after the last checkpoint, they will be redone
+    mode = "r+b" if os.path.exists(output_path) else "wb"
+    with open(output_path, mode) as out, ThreadPoolExecutor(concurrency) as pool:
+        out.truncate(checkpoint["output_offset"])
+        out.seek(checkpoint["output_offset"])
+
+        pending = deque()  # (future, input offset after the question), in input order
+
+        def write_ready(wait):
+            # Write finished answers in input order; wait=True blocks on the oldest one
+            while pending and (wait or pending[0][0].done()):
+                wait = False
+                future, input_offset = pending.popleft()
+                with phase("write"):
+                    out.write((json.dumps(future.result(), ensure_ascii=False) + "\n").encode("utf-8"))
+
+                checkpoint["input_offset"] = input_offset
+                checkpoint["processed"] += 1
+                if checkpoint["processed"] % checkpoint_every == 0:
+                    out.flush()
+                    checkpoint["output_offset"] = out.tell()
+                    save_checkpoint(checkpoint_path, checkpoint)
+                    print(f"Answered {checkpoint['processed']} questions "
+                          f"(weather cache hits={cache.hits}, misses={cache.misses})")
+
+        for line, input_offset in read_questions(input_path, checkpoint["input_offset"]):
+            pending.append((pool.submit(answer_question, line, cache, model), input_offset))
+            write_ready(wait=len(pending) >= 2 * concurrency)
+
+        while pending:
+            write_ready(wait=True)
+
+        out.flush()
+        checkpoint["output_offset"] = out.tell()
+        save_checkpoint(checkpoint_path, checkpoint)
+
+    print("\n" + "=" * 50)
+    print("BATCH COMPLETE")
+    print("=" * 50)
+    print(f"Questions answered: {checkpoint['processed']}")
+    print(f"Weather lookups: {cache.misses} (deduplicated {cache.hits})")
+    print(f"Output: {output_path}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    profiling.start("batch")
+
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions with the weather agent.")
+    parser.add_argument("input", help="JSONL file with {\"id\": ..., \"question\": ...} per line")
+    parser.add_argument("output", help="JSONL file for answers (appended when resuming)")
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--checkpoint", default=None, help="Progress file (default: <output>.checkpoint)")
+    args = parser.parse_args()
+
+    run_batch(args.input, args.output, model=args.model, concurrency=args.concurrency,
+              checkpoint_path=args.checkpoint)
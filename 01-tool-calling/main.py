@@ -1,18 +1,36 @@
 import os
+import sys
 import json
 import requests
+from pathlib import Path
 from urllib.parse import quote
-from openai import OpenAI
+from openai import OpenAI, APIConnectionError
 from pprint import pprint
 from dotenv import load_dotenv
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # Shared profiling.py, ratelimit.py
+import profiling
+from profiling import phase
+from ratelimit import INTERACTIVE, estimate_tokens, get_scheduler
+
 # Load environment variables
 load_dotenv()
 
 # Initialize OpenAI client
+# Retries and 429 backoff are handled by the shared scheduler instead
 client = OpenAI(
     api_key=os.environ.get("OPENAI_API_KEY"),
+    max_retries=0,
 )
+scheduler = get_scheduler(retry_on=(APIConnectionError,))
+
+def create_chat_completion(priority=INTERACTIVE, **kwargs):
+    """client.chat.completions.create through the rate limit scheduler."""
+    def send():
+        raw = client.chat.completions.with_raw_response.create(**kwargs)
+        return raw.parse(), raw.headers
+
+    return scheduler.call(send, tokens=estimate_tokens(kwargs["messages"]), priority=priority)
 
 # Function Implementations
 def get_current_weather(location: str):
@@ -107,17 +125,22 @@ available_functions = {
 }
 
 # Function to process messages and handle function calls
-def get_completion_from_messages(messages, model="gpt-4o"):
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        tools=tools,  # Custom tools
-        tool_choice="auto"  # Allow AI to decide if a tool should be called
-    )
+def get_completion_from_messages(messages, model="gpt-4o", priority=INTERACTIVE, functions=None, verbose=True):
+    functions = functions or available_functions
+
+    with phase("model_call"):
+        response = create_chat_completion(
+            priority=priority,
+            model=model,
+            messages=messages,
+            tools=tools,  # Custom tools
+            tool_choice="auto"  # Allow AI to decide if a tool should be called
+        )
 
     response_message = response.choices[0].message
 
-    print("First response:", response_message)
+    if verbose:
+        print("First response:", response_message)
 
     if response_message.tool_calls:
         # Find the tool call content
@@ -129,10 +152,12 @@ def get_completion_from_messages(messages, model="gpt-4o"):
         tool_id = tool_call.id
         
         # Call the function
-        function_to_call = available_functions[function_name]
-        function_response = function_to_call(**function_args)
+        function_to_call = functions[function_name]
+        with phase("tool_call"):
+            function_response = function_to_call(**function_args)
 
-        print(function_response)
+        if verbose:
+            print(function_response)
 
         messages.append({
             "role": "assistant",
@@ -155,28 +180,35 @@ def get_completion_from_messages(messages, model="gpt-4o"):
         })
 
         # Second call to get final response based on function output
-        second_response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            tools=tools,  
-            tool_choice="auto"  
-        )
+        with phase("model_call"):
+            second_response = create_chat_completion(
+                priority=priority,
+                model=model,
+                messages=messages,
+                tools=tools,  
+                tool_choice="auto"  
+            )
         final_answer = second_response.choices[0].message
 
-        print("Second response:", final_answer)
+        if verbose:
+            print("Second response:", final_answer)
         return final_answer
 
-    return "No relevant function call found."
+    # No tool needed, the model answered directly
+    return response_message
 
 # Example usage
-messages = [
-    {"role": "system", "content": "You are a helpful AI assistant."},
-    # Try any location: "Prague", "Brno, CZ", "49.74,13.59"
-    {"role": "user", "content": "What is the current weather in Prague?"},
-]
-
-response = get_completion_from_messages(messages)
-print("--- Full response: ---")
-pprint(response)
-print("--- Response text: ---")
-print(response.content)
+if __name__ == "__main__":
+    profiling.start("tool_calling")
+
+    messages = [
+        {"role": "system", "content": "You are a helpful AI assistant."},
+        # Try any location: "Prague", "Brno, CZ", "49.74,13.59"
+        {"role": "user", "content": "What is the current weather in Prague?"},
+    ]
+
+    response = get_completion_from_messages(messages)
+    print("--- Full response: ---")
+    pprint(response)
+    print("--- Response text: ---")
+    print(response.content)
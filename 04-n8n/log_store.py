@@ -0,0 +1,316 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Columns are VARCHAR(4000) in the Postgres schema (see README)
+MAX_TEXT_LENGTH = 4000
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_input VARCHAR(4000),
+    agent_response VARCHAR(4000),
+    when_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# Every aggregate query filters on when_created, so keep it indexed
+INDEX_DDL = "CREATE INDEX IF NOT EXISTS log_when_created_idx ON log (when_created)"
+
+
+class LogStore:
+    """
+    Buffered writer and aggregate-first reader for the `log` table.
+
+    Inserts are queued in memory and written with one `executemany` per batch,
+    either when `batch_size` rows are pending or every `flush_interval` seconds.
+    Reads flush pending rows first, so the agent always sees its own chats.
+
+    Works with SQLite (local stand-in) or Postgres (psycopg, optional).
+    """
+
+    def __init__(self, dsn="log.db", batch_size=50, flush_interval=2.0, max_page_size=100, max_backlog=100_000):
+        self.dsn = dsn
+        self.batch_size = batch_size
+        self.max_backlog = max_backlog
+        self.flush_interval = flush_interval
+        self.max_page_size = max_page_size
+
+        self.is_postgres = dsn.startswith(("postgres://", "postgresql://"))
+        if self.is_postgres:
+            import psycopg  # Optional, only needed for a real Postgres backend
+
+            self.conn = psycopg.connect(dsn)
+            self.placeholder = "%s"
+            # Bucket in UTC, not the session TimeZone
+            self.day_expr = "to_char(date_trunc('day', when_created AT TIME ZONE 'UTC'), 'YYYY-MM-DD')"
+        else:
+            self.conn = sqlite3.connect(dsn, check_same_thread=False)
+            self.conn.execute(SQLITE_SCHEMA)
+            self.placeholder = "?"
+            self.day_expr = "substr(when_created, 1, 10)"
+
+        self.conn.execute(INDEX_DDL)
+        self.conn.commit()
+
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    # ---------------------------
+    # Writes
+    # ---------------------------
+
+    def insert(self, chat_input, agent_response):
+        """Queue one chat for insertion. Timestamp is taken now, not at flush."""
+        row = (
+            _truncate(chat_input),
+            _truncate(agent_response),
+            self._timestamp(datetime.now(timezone.utc)),
+        )
+        with self._pending_lock:
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+
+        if full:
+            try:
+                self.flush()
+            except Exception as e:
+                # Rows stay queued, the periodic flusher retries them
+                print(f"Warning: log flush failed, will retry: {e}")
+
+    def flush(self):
+        """
+        Write all pending rows in a single transaction.
+
+        On failure the rows are put back in front of the queue (keeping at most
+        `max_backlog` rows, oldest dropped first) and the error is re-raised.
+        """
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+
+        p = self.placeholder
+        try:
+            with self._db_lock:
+                try:
+                    cur = self.conn.cursor()
+                    cur.executemany(
+                        f"INSERT INTO log (chat_input, agent_response, when_created) VALUES ({p}, {p}, {p})",
+                        rows,
+                    )
+                    self.conn.commit()
+                except Exception:
+                    self.conn.rollback()
+                    raise
+        except Exception:
+            with self._pending_lock:
+                self._pending = rows + self._pending
+                dropped = len(self._pending) - self.max_backlog
+                if dropped > 0:
+                    del self._pending[:dropped]
+                    print(f"Warning: log backlog full, dropped {dropped} oldest rows")
+            raise
+        return len(rows)
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                # Keep the flusher alive, e.g. while Postgres is restarting
+                print(f"Warning: log flush failed, will retry: {e}")
+
+    def close(self):
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        self.conn.close()
+
+    # ---------------------------
+    # Reads
+    # ---------------------------
+
+    def stats(self, since=None, until=None):
+        """Count records and first/last timestamps in [since, until)."""
+        where, params = self._time_range(since, until)
+        row = self._query_one(
+            f"SELECT COUNT(*), MIN(when_created), MAX(when_created) FROM log {where}",
+            params,
+        )
+        return {"count": row[0], "first": _iso(row[1]), "last": _iso(row[2])}
+
+    def daily_counts(self, since=None, until=None):
+        """Number of records per UTC day in [since, until)."""
+        where, params = self._time_range(since, until)
+        rows = self._query_all(
+            f"SELECT {self.day_expr} AS day, COUNT(*) FROM log {where} GROUP BY day ORDER BY day",
+            params,
+        )
+        return [{"day": day, "count": count} for day, count in rows]
+
+    def page(self, limit=20, before=None, since=None, until=None):
+        """
+        Newest-first page of records using keyset pagination on `id`.
+
+        Args:
+            limit: Page size, capped at `max_page_size`
+            before: Return records with id < before (cursor from previous page)
+            since, until: Optional ISO-8601 time range
+
+        Returns:
+            {"records": [...], "next_before": id or None}
+        """
+        limit = max(1, min(int(limit), self.max_page_size))
+        where, params = self._time_range(since, until)
+        if before is not None:
+            where += (" AND " if where else "WHERE ") + f"id < {self.placeholder}"
+            params.append(int(before))
+
+        rows = self._query_all(
+            f"SELECT id, chat_input, agent_response, when_created FROM log {where} "
+            f"ORDER BY id DESC LIMIT {self.placeholder}",
+            params + [limit],
+        )
+        records = [
+            {"id": r[0], "chat_input": r[1], "agent_response": r[2], "when_created": _iso(r[3])}
+            for r in rows
+        ]
+        next_before = records[-1]["id"] if len(records) == limit else None
+        return {"records": records, "next_before": next_before}
+
+    def _time_range(self, since, until):
+        clauses, params = [], []
+        if since:
+            clauses.append(f"when_created >= {self.placeholder}")
+            params.append(self._timestamp(_parse_time(since)))
+        if until:
+            clauses.append(f"when_created < {self.placeholder}")
+            params.append(self._timestamp(_parse_time(until)))
+        where = "WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, params
+
+    def _timestamp(self, dt):
+        # psycopg adapts datetimes natively; SQLite stores sortable ISO strings
+        if self.is_postgres:
+            return dt
+        return dt.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    def _query_one(self, sql, params):
+        return self._query_all(sql, params)[0]
+
+    def _query_all(self, sql, params):
+        self.flush()
+        with self._db_lock:
+            cur = self.conn.cursor()
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+            if self.is_postgres:
+                self.conn.commit()  # Close the read transaction
+        return rows
+
+
+def _truncate(text):
+    if text is None:
+        return None
+    text = str(text)
+    return text[:MAX_TEXT_LENGTH]
+
+
+def _parse_time(value):
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _iso(value):
+    """ISO-8601 in UTC (`+00:00`) for both backends."""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = _parse_time(value)  # SQLite returns naive UTC strings
+    return value.astimezone(timezone.utc).isoformat()
+
+
+# ---------------------------
+# HTTP API for the n8n workflow
+# ---------------------------
+
+def make_handler(store):
+    class LogStoreHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if urlparse(self.path).path != "/log":
+                return self._send(404, {"error": "not_found"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError) as e:
+                return self._send(400, {"error": "invalid_json", "detail": str(e)})
+            if not isinstance(body, dict):
+                return self._send(400, {"error": "invalid_json", "detail": "expected a JSON object"})
+
+            store.insert(body.get("chat_input"), body.get("agent_response"))
+            self._send(202, {"queued": True})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            since, until = query.get("since"), query.get("until")
+            try:
+                if url.path == "/log/stats":
+                    return self._send(200, store.stats(since, until))
+                if url.path == "/log/daily":
+                    return self._send(200, store.daily_counts(since, until))
+                if url.path == "/log":
+                    return self._send(200, store.page(
+                        limit=query.get("limit", 20),
+                        before=query.get("before"),
+                        since=since,
+                        until=until,
+                    ))
+            except ValueError as e:
+                return self._send(400, {"error": "invalid_query", "detail": str(e)})
+            except Exception as e:
+                return self._send(500, {"error": "database_error", "detail": str(e)})
+            self._send(404, {"error": "not_found"})
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return LogStoreHandler
+
+
+if __name__ == "__main__":
+    dsn = os.environ.get("LOG_STORE_DSN", "log.db")
+    host = os.environ.get("LOG_STORE_HOST", "0.0.0.0")
+    port = int(os.environ.get("LOG_STORE_PORT", "8080"))
+
+    store = LogStore(
+        dsn,
+        batch_size=int(os.environ.get("LOG_STORE_BATCH_SIZE", "50")),
+        flush_interval=float(os.environ.get("LOG_STORE_FLUSH_INTERVAL", "2.0")),
+    )
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    print(f"Log store listening on http://{host}:{port} (backend: {'postgres' if store.is_postgres else 'sqlite'})")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down, flushing pending rows...")
+    finally:
+        server.server_close()
+        store.close()
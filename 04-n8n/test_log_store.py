@@ -0,0 +1,89 @@
+import sqlite3
+
+from log_store import LogStore
+
+
+def make_store(tmp_path, **kwargs):
+    # SQLite file stands in for the Postgres log table
+    return LogStore(str(tmp_path / "log.db"), flush_interval=3600, **kwargs)
+
+
+def count_rows(tmp_path):
+    with sqlite3.connect(tmp_path / "log.db") as conn:
+        return conn.execute("SELECT COUNT(*) FROM log").fetchone()[0]
+
+
+def test_inserts_are_written_in_batches(tmp_path):
+    store = make_store(tmp_path, batch_size=3)
+
+    store.insert("q1", "a1")
+    store.insert("q2", "a2")
+    assert count_rows(tmp_path) == 0  # Still buffered
+
+    store.insert("q3", "a3")
+    assert count_rows(tmp_path) == 3  # Batch of 3 flushed
+
+    store.insert("q4", "a4")
+    store.close()
+    assert count_rows(tmp_path) == 4  # Remainder flushed on close
+
+
+def test_stats_and_daily_counts(tmp_path):
+    store = make_store(tmp_path, batch_size=100)
+    for i in range(5):
+        store.insert(f"q{i}", f"a{i}")
+
+    # Reads flush pending rows first
+    stats = store.stats()
+    assert stats["count"] == 5
+    assert stats["first"] <= stats["last"]
+    assert stats["first"].endswith("+00:00")  # ISO-8601 UTC, same as Postgres
+
+    assert store.stats(since="2000-01-01T00:00:00Z", until="2001-01-01T00:00:00Z")["count"] == 0
+
+    daily = store.daily_counts()
+    assert len(daily) == 1
+    assert daily[0]["count"] == 5
+    assert daily[0]["day"] == stats["first"][:10]
+    store.close()
+
+
+def test_page_cursor(tmp_path):
+    store = make_store(tmp_path, batch_size=100)
+    for i in range(7):
+        store.insert(f"q{i}", f"a{i}")
+
+    first = store.page(limit=3)
+    assert [r["chat_input"] for r in first["records"]] == ["q6", "q5", "q4"]
+    assert "T" in first["records"][0]["when_created"]
+
+    second = store.page(limit=3, before=first["next_before"])
+    assert [r["chat_input"] for r in second["records"]] == ["q3", "q2", "q1"]
+
+    last = store.page(limit=3, before=second["next_before"])
+    assert [r["chat_input"] for r in last["records"]] == ["q0"]
+    assert last["next_before"] is None
+    store.close()
+
+
+def test_failed_flush_keeps_rows(tmp_path):
+    store = make_store(tmp_path, batch_size=100)
+    store.insert("q1", "a1")
+
+    class BrokenConnection:
+        def cursor(self):
+            raise sqlite3.OperationalError("connection lost")
+
+        def rollback(self):
+            pass
+
+    conn, store.conn = store.conn, BrokenConnection()
+    try:
+        store.flush()
+    except sqlite3.OperationalError:
+        pass
+    store.conn = conn
+
+    assert store.flush() == 1
+    assert count_rows(tmp_path) == 1
+    store.close()
@@ -1,8 +1,11 @@
 from typing import Annotated
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 from typing_extensions import TypedDict
 from langchain_openai import ChatOpenAI
+from openai import APIConnectionError
 from langgraph.graph import StateGraph
 from langgraph.graph.message import add_messages
 from langchain_core.tools import tool
@@ -11,11 +14,19 @@ from langchain_community.tools.arxiv.tool import ArxivQueryRun
 from langchain_community.utilities.wolfram_alpha import WolframAlphaAPIWrapper
 from langchain_community.tools.wolfram_alpha.tool import WolframAlphaQueryRun
 from langchain_core.tools import Tool
+from langchain_core.runnables import RunnableConfig
 from langchain_experimental.utilities import PythonREPL
 from langgraph.prebuilt import ToolNode
 from typing import Literal
 from visualizer import visualize
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # Shared profiling.py, ratelimit.py
+import profiling
+from profiling import phase
+from ratelimit import estimate_tokens, get_scheduler
+
 load_dotenv()
+profiling.start("langgraph")
 
 
 # Wolfram Alpha API is returning correct content type "text/xml; charset=utf-8"
@@ -88,7 +99,10 @@ def prepare_tools():
     return tools
 
 # Model
-llm = ChatOpenAI(model="gpt-4.1-nano")
+# Retries and 429 backoff are handled by the shared scheduler, which reads
+# the x-ratelimit-* headers exposed in response_metadata
+llm = ChatOpenAI(model="gpt-4.1-nano", max_retries=0, include_response_headers=True)
+scheduler = get_scheduler(retry_on=(APIConnectionError,))
 
 # Tools
 tools = prepare_tools()
@@ -109,11 +123,20 @@ graph_builder = StateGraph(State)
 
 # Node 1 ----------
 def chatbot(state: State):
-    return {"messages": [llm.invoke(state["messages"])]}
+    def send():
+        message = llm.invoke(state["messages"])
+        return message, message.response_metadata.get("headers", {})
+
+    with phase("model_call"):
+        return {"messages": [scheduler.call(send, tokens=estimate_tokens(state["messages"]))]}
 
 # Node 2 ----------
 tool_node = ToolNode(tools)
 
+def run_tools(state: State, config: RunnableConfig):
+    with phase("tool_call"):
+        return tool_node.invoke(state, config)
+
 # Edge 1 -------------------
 
 def route_tools(
@@ -137,7 +160,7 @@ def route_tools(
     return "__end__"
 
 graph_builder.add_node("chatbot", chatbot)
-graph_builder.add_node("tools", tool_node)
+graph_builder.add_node("tools", run_tools)
 
 # Define edges: start -> chatbot, and tools -> chatbot (creating the agent loop)
 graph_builder.add_edge("__start__", "chatbot")
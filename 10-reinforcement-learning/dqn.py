@@ -0,0 +1,303 @@
+import numpy as np
+import gymnasium as gym
+import setup
+from replay import ReplayBuffer
+from metrics import TrainingMetrics
+from training import plot_results
+
+
+class QNetwork:
+    """
+    Small fully connected network: observation → Q-value per action.
+
+    Two ReLU hidden layers, forward and backward passes are plain NumPy
+    matrix products over the whole minibatch (CPU only).
+    """
+
+    def __init__(self, input_size=2, hidden_size=64, output_size=4, seed=None):
+        rng = np.random.default_rng(seed)
+
+        def he(fan_in, fan_out):
+            return (rng.standard_normal((fan_in, fan_out)) * np.sqrt(2.0 / fan_in)).astype(np.float32)
+
+        self.params = {
+            "W1": he(input_size, hidden_size),
+            "b1": np.zeros(hidden_size, dtype=np.float32),
+            "W2": he(hidden_size, hidden_size),
+            "b2": np.zeros(hidden_size, dtype=np.float32),
+            "W3": he(hidden_size, output_size),
+            "b3": np.zeros(output_size, dtype=np.float32),
+        }
+
+    def forward(self, x):
+        """Return Q-values of shape (batch, actions) and activations for backward()."""
+        p = self.params
+        h1 = np.maximum(x @ p["W1"] + p["b1"], 0)
+        h2 = np.maximum(h1 @ p["W2"] + p["b2"], 0)
+        q = h2 @ p["W3"] + p["b3"]
+        return q, (x, h1, h2)
+
+    def predict(self, x):
+        return self.forward(x)[0]
+
+    def backward(self, cache, grad_q):
+        """Gradients of the loss w.r.t. all parameters, given dLoss/dQ."""
+        x, h1, h2 = cache
+        p = self.params
+
+        grad_h2 = (grad_q @ p["W3"].T) * (h2 > 0)
+        grad_h1 = (grad_h2 @ p["W2"].T) * (h1 > 0)
+
+        return {
+            "W3": h2.T @ grad_q,
+            "b3": grad_q.sum(axis=0),
+            "W2": h1.T @ grad_h2,
+            "b2": grad_h2.sum(axis=0),
+            "W1": x.T @ grad_h1,
+            "b1": grad_h1.sum(axis=0),
+        }
+
+    def copy_from(self, other):
+        for name, value in other.params.items():
+            self.params[name][...] = value
+
+    def save(self, path):
+        np.savez(path, **self.params)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        net = cls(data["W1"].shape[0], data["W1"].shape[1], data["W3"].shape[1])
+        net.params = {name: data[name] for name in net.params}
+        return net
+
+
+class Adam:
+    """Adam optimizer over a dict of NumPy parameters (updated in place)."""
+
+    def __init__(self, params, lr=1e-3, beta1=0.9, beta2=0.999, eps=1e-8):
+        self.lr = lr
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.t = 0
+        self.m = {name: np.zeros_like(v) for name, v in params.items()}
+        self.v = {name: np.zeros_like(v) for name, v in params.items()}
+
+    def step(self, params, grads):
+        self.t += 1
+        correction1 = 1 - self.beta1 ** self.t
+        correction2 = 1 - self.beta2 ** self.t
+        for name, grad in grads.items():
+            self.m[name] = self.beta1 * self.m[name] + (1 - self.beta1) * grad
+            self.v[name] = self.beta2 * self.v[name] + (1 - self.beta2) * grad * grad
+            m_hat = self.m[name] / correction1
+            v_hat = self.v[name] / correction2
+            params[name] -= self.lr * m_hat / (np.sqrt(v_hat) + self.eps)
+
+
+def dqn_update(online, target, optimizer, batch, gamma):
+    """
+    One minibatch DQN step with a Huber loss.
+
+    Target: r + γ max_a' Q_target(s', a'), with no future value at terminal states.
+    """
+    states, actions, rewards, next_states, dones = batch
+    batch_size = len(actions)
+    rows = np.arange(batch_size)
+
+    targets = rewards + gamma * target.predict(next_states).max(axis=1) * ~dones
+    q, cache = online.forward(states)
+    error = q[rows, actions] - targets
+
+    # Huber loss gradient: linear beyond |error| > 1 keeps large rewards stable
+    grad_q = np.zeros_like(q)
+    grad_q[rows, actions] = np.clip(error, -1.0, 1.0) / batch_size
+
+    optimizer.step(online.params, online.backward(cache, grad_q))
+    return float(np.mean(error ** 2))
+
+
+def train_dqn(
+    episodes=1000,
+    alpha=1e-3,
+    gamma=0.95,
+    epsilon=0.1,
+    grid_size=5,
+    seed=42,
+    hidden_size=64,
+    batch_size=64,
+    replay_capacity=50_000,
+    learning_starts=500,
+    target_update=500,
+    epsilon_decay_steps=5_000,
+    metrics_file="dqn_metrics.npz"
+):
+    """
+    Train DQN agent in Grid World.
+
+    Args:
+        episodes: Number of training episodes
+        alpha: Learning rate (Adam)
+        gamma: Discount factor
+        epsilon: Final exploration rate (decays linearly from 1.0)
+        grid_size: Size of the grid
+        seed: Random seed for reproducibility
+        hidden_size: Units per hidden layer
+        batch_size: Minibatch size sampled from the replay buffer
+        replay_capacity: Size of the transition ring buffer
+        learning_starts: Environment steps collected before the first update
+        target_update: Environment steps between target network syncs
+        epsilon_decay_steps: Environment steps to anneal ε from 1.0 to `epsilon`
+        metrics_file: Where downsampled reward/length curves are written
+
+    Returns:
+        Trained QNetwork, TrainingMetrics
+    """
+    env = gym.make("GridWorld-v0", grid_size=grid_size, num_obstacles=3, seed=seed)
+    env.action_space.seed(seed)
+    rng = np.random.default_rng(seed)
+
+    online = QNetwork(hidden_size=hidden_size, seed=seed)
+    target = QNetwork(hidden_size=hidden_size)
+    target.copy_from(online)
+    optimizer = Adam(online.params, lr=alpha)
+
+    # Observations are the env's normalized (row, col), no table needed
+    replay = ReplayBuffer(replay_capacity, state_shape=(2,), state_dtype=np.float32, seed=seed)
+
+    print("\n" + "=" * 50)
+    print("TRAINING DQN AGENT")
+    print("=" * 50)
+    print(f"Episodes: {episodes}")
+    print(f"Learning rate (α): {alpha}")
+    print(f"Discount factor (γ): {gamma}")
+    print(f"Exploration rate (ε): 1.0 → {epsilon} over {epsilon_decay_steps} steps")
+    print(f"Network: 2 → {hidden_size} → {hidden_size} → 4")
+    print("=" * 50)
+
+    metrics = TrainingMetrics(metrics_file)
+    progress_lines = []
+    env_steps = 0
+
+    for episode in range(episodes):
+        state, _ = env.reset()
+
+        total_reward = 0
+        done = False
+
+        while not done:
+            # Epsilon-greedy on the network's Q-values
+            eps = max(epsilon, 1.0 - (1.0 - epsilon) * env_steps / epsilon_decay_steps)
+            if rng.random() < eps:
+                action = env.action_space.sample()
+            else:
+                action = int(np.argmax(online.predict(state[None, :])[0]))
+
+            next_state, reward, terminated, truncated, _ = env.step(action)
+            replay.add(state, action, reward, next_state, terminated)
+            env_steps += 1
+
+            if env_steps >= learning_starts:
+                dqn_update(online, target, optimizer, replay.sample(batch_size), gamma)
+            if env_steps % target_update == 0:
+                target.copy_from(online)
+
+            state = next_state
+            total_reward += reward
+            done = terminated or truncated
+
+        metrics.record(total_reward, env.unwrapped.step_counter)
+
+        if (episode + 1) % 100 == 0:
+            progress_lines.append(
+                f"Episode {episode + 1}/{episodes} | "
+                f"Avg Reward: {metrics.rewards.mean:.2f} | "
+                f"Avg Length: {metrics.lengths.mean:.2f}"
+            )
+
+    env.close()
+    metrics.close()
+
+    print()
+    for line in progress_lines:
+        print(line)
+    print(f"Total environment steps: {env_steps}")
+
+    online.save("dqn_weights.npz")
+    print("\n" + "=" * 50)
+    print("✅ Training complete! Network saved to 'dqn_weights.npz'")
+    print("=" * 50)
+
+    return online, metrics
+
+
+def evaluate_dqn(network, num_episodes=5, grid_size=5, seed=42):
+    """
+    Evaluate trained DQN agent.
+
+    Args:
+        network: Trained QNetwork
+        num_episodes: Number of evaluation episodes
+        grid_size: Size of the grid
+        seed: Random seed for reproducibility
+    """
+    env = gym.make("GridWorld-v0", grid_size=grid_size, num_obstacles=3, seed=seed)
+    action_names = ["Up", "Right", "Down", "Left"]
+    total_rewards = []
+
+    for episode in range(num_episodes):
+        state, _ = env.reset()
+
+        total_reward = 0
+        done = False
+
+        while not done:
+            q_values = network.predict(state[None, :])[0]
+            action = int(np.argmax(q_values))
+
+            row, col = (state * (grid_size - 1)).round().astype(int)  # Denormalize
+            print(f"\nState ({row},{col})")
+            print(f"Q-values: Up={q_values[0]:.2f} | "
+                  f"Right={q_values[1]:.2f} | "
+                  f"Down={q_values[2]:.2f} | "
+                  f"Left={q_values[3]:.2f}")
+            print(f"Chosen Action: {action_names[action]} ({action})")
+
+            state, reward, terminated, truncated, _ = env.step(action)
+            env.render()
+
+            total_reward += reward
+            done = terminated or truncated
+
+        total_rewards.append(total_reward)
+        print(f"\n{'=' * 50}")
+        print(f"Episode {episode + 1} finished")
+        print(f"Steps: {env.unwrapped.step_counter}")
+        print(f"Total Reward: {total_reward:.2f}")
+        print(f"{'=' * 50}")
+
+    avg_reward = np.mean(total_rewards)
+    print(f"\n{'=' * 50}")
+    print("EVALUATION SUMMARY")
+    print(f"{'=' * 50}")
+    print(f"Episodes evaluated: {num_episodes}")
+    print(f"Average reward: {avg_reward:.2f}")
+    print(f"{'=' * 50}\n")
+
+    env.close()
+
+
+if __name__ == "__main__":
+    network, metrics = train_dqn(
+        episodes=300,
+        alpha=1e-3,
+        gamma=0.95,
+        epsilon=0.05,
+        grid_size=5,
+        seed=42
+    )
+
+    plot_results(metrics.path, output_file="dqn_results.png")
+
+    evaluate_dqn(QNetwork.load("dqn_weights.npz"), num_episodes=3, grid_size=5, seed=42)
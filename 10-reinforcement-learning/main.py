@@ -1,7 +1,14 @@
+import sys
+from pathlib import Path
+
 import numpy as np
 import gymnasium as gym
 import setup
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # Shared profiling.py
+import profiling
+from profiling import phase
+
 
 def evaluate_agent(q_table, num_episodes=5, grid_size=5, seed=42):
     """
@@ -32,7 +39,7 @@ def evaluate_agent(q_table, num_episodes=5, grid_size=5, seed=42):
 
     for episode in range(num_episodes):
         state, _ = env.reset()
-        state = (state * (grid_size - 1)).astype(int)  # Denormalize
+        state = (state * (grid_size - 1)).round().astype(int)  # Denormalize
 
         total_reward = 0
         done = False
@@ -41,7 +48,8 @@ def evaluate_agent(q_table, num_episodes=5, grid_size=5, seed=42):
             row, col = state
 
             # Select best action from Q-table
-            action = np.argmax(q_table[row, col, :])
+            with phase("policy_lookup"):
+                action = np.argmax(q_table[row, col, :])
 
             # Print Q-values for current state
             print(f"\nState ({row},{col})")
@@ -54,8 +62,9 @@ def evaluate_agent(q_table, num_episodes=5, grid_size=5, seed=42):
             print(f"Chosen Action: {action_names[action]} ({action})")
 
             # Take action
-            next_state, reward, terminated, truncated, _ = env.step(action)
-            next_state = (next_state * (grid_size - 1)).astype(int)
+            with phase("env_step"):
+                next_state, reward, terminated, truncated, _ = env.step(action)
+            next_state = (next_state * (grid_size - 1)).round().astype(int)
 
             env.render()
 
@@ -82,6 +91,8 @@ def evaluate_agent(q_table, num_episodes=5, grid_size=5, seed=42):
 
 
 if __name__ == "__main__":
+    profiling.start("evaluation")
+
     # Load trained Q-table
     try:
         q_table = np.load("q_table.npy")
@@ -0,0 +1,233 @@
+import numpy as np
+
+
+class RollingStats:
+    """
+    Mean and variance over the last `window` values in O(1) per update.
+
+    Uses a sliding Welford update on a fixed ring buffer, so memory does
+    not grow with the number of episodes.
+    """
+
+    def __init__(self, window=100):
+        self.window = window
+        self.values = np.zeros(window)
+        self.position = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, x):
+        x = float(x)
+        if self.count < self.window:
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (x - self.mean)
+        else:
+            # Replace the oldest value in one step
+            old = self.values[self.position]
+            new_mean = self.mean + (x - old) / self.window
+            self._m2 += (x - old) * (x - new_mean + old - self.mean)
+            self.mean = new_mean
+
+        self.values[self.position] = x
+        self.position = (self.position + 1) % self.window
+
+    @property
+    def variance(self):
+        return max(self._m2, 0.0) / self.count if self.count else 0.0
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate with the P² algorithm (Jain & Chlamtac, 1985).
+
+    Keeps five markers instead of the observations, so memory is constant.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        x = float(x)
+        self.count += 1
+
+        if self.count <= 5:
+            self.heights.append(x)
+            self.heights.sort()
+            return
+
+        q, n = self.heights, self.positions
+
+        # Find the cell containing x, extending the extremes if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(1, 5) if x < q[i]) - 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = candidate
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self):
+        if self.count == 0:
+            return float("nan")
+        if self.count <= 5:
+            return float(np.percentile(self.heights, self.p * 100))
+        return self.heights[2]
+
+
+class CurveWriter:
+    """
+    Downsampled min/mean/max curves for several series in bounded memory.
+
+    Values are accumulated into at most `max_points` buckets. When all
+    buckets are full, neighbouring pairs are merged and the bucket width
+    doubles, so the curve always spans the whole run at a fixed resolution.
+    """
+
+    def __init__(self, names, max_points=1000):
+        if max_points % 2:
+            raise ValueError("max_points must be even")
+
+        self.names = list(names)
+        self.max_points = max_points
+        self.width = 1  # Episodes per bucket
+        self.size = 0   # Buckets in use
+
+        shape = (max_points, len(self.names))
+        self.mins = np.full(shape, np.inf)
+        self.maxs = np.full(shape, -np.inf)
+        self.sums = np.zeros(shape)
+        self.counts = np.zeros(max_points, dtype=np.int64)
+
+    def add(self, values):
+        """Add one value per series (e.g. one episode)."""
+        if self.size == 0 or self.counts[self.size - 1] == self.width:
+            if self.size == self.max_points:
+                self._merge()
+            self.size += 1
+
+        i = self.size - 1
+        values = np.asarray(values, dtype=np.float64)
+        np.minimum(self.mins[i], values, out=self.mins[i])
+        np.maximum(self.maxs[i], values, out=self.maxs[i])
+        self.sums[i] += values
+        self.counts[i] += 1
+
+    def _merge(self):
+        half = self.max_points // 2
+        self.mins[:half] = np.minimum(self.mins[0::2], self.mins[1::2])
+        self.maxs[:half] = np.maximum(self.maxs[0::2], self.maxs[1::2])
+        self.sums[:half] = self.sums[0::2] + self.sums[1::2]
+        self.counts[:half] = self.counts[0::2] + self.counts[1::2]
+
+        self.mins[half:] = np.inf
+        self.maxs[half:] = -np.inf
+        self.sums[half:] = 0.0
+        self.counts[half:] = 0
+
+        self.size = half
+        self.width *= 2
+
+    def arrays(self):
+        """Bucket start episodes and per-series min/mean/max, trimmed to use."""
+        counts = self.counts[:self.size]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        return {
+            "episode": starts,
+            "count": counts,
+            "min": self.mins[:self.size],
+            "mean": self.sums[:self.size] / counts[:, None],
+            "max": self.maxs[:self.size],
+        }
+
+
+class TrainingMetrics:
+    """
+    Constant-memory record of episode rewards and lengths.
+
+    Tracks rolling mean/variance over the last `window` episodes, streaming
+    percentiles of episode length, and downsampled curves that are saved
+    to `path` every `save_every` episodes and on `close()`.
+    """
+
+    SERIES = ["reward", "reward_avg", "length", "length_avg"]
+
+    def __init__(self, path="training_metrics.npz", window=100, max_points=1000, save_every=1000):
+        self.path = path
+        self.window = window
+        self.save_every = save_every
+
+        self.episodes = 0
+        self.rewards = RollingStats(window)
+        self.lengths = RollingStats(window)
+        self.length_percentiles = {p: P2Quantile(p) for p in (0.5, 0.9, 0.99)}
+        self.curves = CurveWriter(self.SERIES, max_points)
+
+    def record(self, reward, length):
+        self.episodes += 1
+        self.rewards.add(reward)
+        self.lengths.add(length)
+        for estimator in self.length_percentiles.values():
+            estimator.add(length)
+
+        self.curves.add((reward, self.rewards.mean, length, self.lengths.mean))
+
+        if self.path and self.episodes % self.save_every == 0:
+            self.save()
+
+    def summary(self):
+        return {
+            "episodes": self.episodes,
+            "reward_mean": self.rewards.mean,
+            "reward_std": np.sqrt(self.rewards.variance),
+            "length_mean": self.lengths.mean,
+            "length_std": np.sqrt(self.lengths.variance),
+            **{f"length_p{int(p * 100)}": e.value for p, e in self.length_percentiles.items()},
+        }
+
+    def save(self, path=None):
+        path = path or self.path
+        arrays = self.curves.arrays()
+        np.savez(
+            path,
+            names=np.array(self.SERIES),
+            window=self.window,
+            episodes=self.episodes,
+            **arrays,
+        )
+
+    def close(self):
+        if self.path:
+            self.save()
@@ -0,0 +1,246 @@
+import os
+import sys
+import queue
+import contextlib
+import traceback
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+import gymnasium as gym
+import setup
+from training import choose_action, plot_results
+from metrics import TrainingMetrics
+
+
+def _worker(
+    worker_id,
+    shm_name,
+    shape,
+    locks,
+    episodes,
+    alpha,
+    gamma,
+    epsilon,
+    grid_size,
+    seed,
+    results
+):
+    """
+    Run Q-learning episodes against the shared Q-table.
+
+    Without locks updates are lock-free (Hogwild): workers may occasionally
+    overwrite each other's update of the same (s, a), which Q-learning
+    tolerates. With locks each state maps to one of `len(locks)` stripes.
+
+    Posts ("episodes", (rewards, lengths)) chunks, then ("done", None), or
+    ("error", traceback) if anything fails so the coordinator never waits forever.
+    """
+    # GridWorldEnv prints every step; interleaved output from N workers is noise
+    sys.stdout = open(os.devnull, "w")
+
+    try:
+        _run_episodes(worker_id, shm_name, shape, locks, episodes,
+                      alpha, gamma, epsilon, grid_size, seed, results)
+    except BaseException:
+        results.put((worker_id, "error", traceback.format_exc()))
+        return
+    results.put((worker_id, "done", None))
+
+
+def _run_episodes(
+    worker_id,
+    shm_name,
+    shape,
+    locks,
+    episodes,
+    alpha,
+    gamma,
+    epsilon,
+    grid_size,
+    seed,
+    results
+):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    q_table = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+    # Same seed → same obstacle layout; exploration differs per worker
+    env = gym.make("GridWorld-v0", grid_size=grid_size, num_obstacles=3, seed=seed)
+    env.action_space.seed(seed + worker_id)
+    np.random.seed(seed + worker_id)
+
+    rewards, lengths = [], []
+
+    for _ in range(episodes):
+        state, _ = env.reset()
+        state = (state * (grid_size - 1)).round().astype(int)  # Denormalize: [0,1] → grid coords
+
+        total_reward = 0
+        done = False
+
+        while not done:
+            action = choose_action(state, q_table, epsilon, env)
+
+            next_state, reward, terminated, truncated, _ = env.step(action)
+            next_state = (next_state * (grid_size - 1)).round().astype(int)
+
+            row, col = state
+            next_row, next_col = next_state
+
+            lock = locks[(row * grid_size + col) % len(locks)] if locks else contextlib.nullcontext()
+            with lock:
+                q_table[row, col, action] += alpha * (
+                    reward + gamma * np.max(q_table[next_row, next_col, :]) - q_table[row, col, action]
+                )
+
+            state = next_state
+            total_reward += reward
+            done = terminated or truncated
+
+        rewards.append(total_reward)
+        lengths.append(env.unwrapped.step_counter)
+
+        # Report in chunks to keep queue traffic low
+        if len(rewards) == 100:
+            results.put((worker_id, "episodes", (rewards, lengths)))
+            rewards, lengths = [], []
+
+    results.put((worker_id, "episodes", (rewards, lengths)))
+
+    env.close()
+    del q_table
+    shm.close()
+
+
+def train_q_learning_parallel(
+    episodes=1000,
+    alpha=0.1,
+    gamma=0.9,
+    epsilon=0.1,
+    grid_size=5,
+    seed=42,
+    workers=None,
+    lock_stripes=0,
+    metrics_file="parallel_metrics.npz"
+):
+    """
+    Train Q-learning agent with several processes sharing one Q-table.
+
+    Args:
+        episodes: Total number of training episodes (split across workers)
+        alpha: Learning rate
+        gamma: Discount factor
+        epsilon: Exploration rate
+        grid_size: Size of the grid
+        seed: Random seed for reproducibility
+        workers: Number of worker processes (default: CPU count)
+        lock_stripes: 0 for lock-free (Hogwild) updates, otherwise number of striped locks
+        metrics_file: Where downsampled reward/length curves are written
+
+    Returns:
+        Trained Q-table, TrainingMetrics (episodes in arrival order)
+    """
+    workers = workers or os.cpu_count()
+    shape = (grid_size, grid_size, 4)
+
+    print("\n" + "=" * 50)
+    print("TRAINING Q-LEARNING AGENT (PARALLEL)")
+    print("=" * 50)
+    print(f"Episodes: {episodes}")
+    print(f"Workers: {workers}")
+    print(f"Updates: {'striped locks (' + str(lock_stripes) + ')' if lock_stripes else 'lock-free (Hogwild)'}")
+    print(f"Learning rate (α): {alpha}")
+    print(f"Discount factor (γ): {gamma}")
+    print(f"Exploration rate (ε): {epsilon}")
+    print("=" * 50)
+
+    # Q-table lives in shared memory, every worker maps the same buffer
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    processes = []
+    try:
+        q_table = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        q_table.fill(0.0)
+
+        ctx = mp.get_context("spawn")
+        locks = [ctx.Lock() for _ in range(lock_stripes)]
+        results = ctx.Queue()
+
+        per_worker = [episodes // workers + (1 if i < episodes % workers else 0) for i in range(workers)]
+        for i in range(workers):
+            p = ctx.Process(
+                target=_worker,
+                args=(i, shm.name, shape, locks, per_worker[i],
+                      alpha, gamma, epsilon, grid_size, seed, results),
+            )
+            p.start()
+            processes.append(p)
+
+        metrics = TrainingMetrics(metrics_file)
+        progress_lines = []
+        running = workers
+
+        # Drain the queue before joining, otherwise workers block on put()
+        while running:
+            try:
+                worker_id, kind, payload = results.get(timeout=1.0)
+            except queue.Empty:
+                # A worker killed outright (e.g. OOM) cannot post an error
+                for i, p in enumerate(processes):
+                    if p.exitcode not in (None, 0):
+                        raise RuntimeError(f"Worker {i} exited with code {p.exitcode}")
+                continue
+
+            if kind == "error":
+                raise RuntimeError(f"Worker {worker_id} failed:\n{payload}")
+            if kind == "done":
+                running -= 1
+                continue
+
+            rewards, lengths = payload
+            for reward, length in zip(rewards, lengths):
+                metrics.record(reward, length)
+                if metrics.episodes % 100 == 0:
+                    progress_lines.append(
+                        f"Episode {metrics.episodes}/{episodes} | "
+                        f"Avg Reward: {metrics.rewards.mean:.2f} | "
+                        f"Avg Length: {metrics.lengths.mean:.2f}"
+                    )
+
+        for p in processes:
+            p.join()
+        metrics.close()
+
+        q_table = q_table.copy()
+    finally:
+        # Stop remaining workers if training failed
+        for p in processes:
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        shm.close()
+        shm.unlink()
+
+    print()
+    for line in progress_lines:
+        print(line)
+
+    np.save("q_table.npy", q_table)
+    print("\n" + "=" * 50)
+    print("✅ Training complete! Q-table saved to 'q_table.npy'")
+    print("=" * 50)
+
+    return q_table, metrics
+
+
+if __name__ == "__main__":
+    q_table, metrics = train_q_learning_parallel(
+        episodes=1000,
+        alpha=0.1,
+        gamma=0.95,
+        epsilon=0.1,
+        grid_size=5,
+        seed=42,
+        workers=4
+    )
+
+    plot_results(metrics.path, output_file="parallel_results.png")
@@ -0,0 +1,236 @@
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+from env import GridWorldEnv
+
+# Same order as GridWorldEnv.step: 0=up, 1=right, 2=down, 3=left
+ACTION_EFFECTS = np.array([[-1, 0], [0, 1], [1, 0], [0, -1]], dtype=np.int32)
+UNREACHABLE = -1
+
+
+def compile_policy(q_table, grid_size=5, num_obstacles=3, seed=42, path="policy.npz"):
+    """
+    Compile a trained Q-table into a compact greedy-policy artifact.
+
+    Stores only what serving needs: a `uint8` action per cell plus the map
+    metadata (grid size, start, goal, obstacles, seed). The artifact is
+    ~grid_size² bytes instead of grid_size² × 4 float64 values.
+
+    The obstacle layout is rebuilt from `seed` and `num_obstacles`, so they
+    must match the values the Q-table was trained with.
+
+    Args:
+        q_table: Trained Q-table of shape (grid_size, grid_size, 4)
+        grid_size: Size of the grid
+        num_obstacles: Number of obstacles the Q-table was trained with
+        seed: Seed of the training environment (determines obstacle layout)
+        path: Output file
+    """
+    if q_table.shape != (grid_size, grid_size, len(ACTION_EFFECTS)):
+        raise ValueError(
+            f"Q-table shape {q_table.shape} does not match grid_size={grid_size} "
+            f"(expected {(grid_size, grid_size, len(ACTION_EFFECTS))})"
+        )
+
+    # Rebuild the training map to capture its obstacle layout
+    env = GridWorldEnv(grid_size=grid_size, num_obstacles=num_obstacles, seed=seed)
+
+    np.savez_compressed(
+        path,
+        actions=np.argmax(q_table, axis=2).astype(np.uint8),
+        obstacles=np.array(env.obstacles, dtype=np.int32).reshape(-1, 2),
+        start=env.start_pos,
+        goal=env.goal_pos,
+        grid_size=grid_size,
+        seed=seed,
+    )
+    print(f"✅ Policy compiled to '{path}'")
+
+
+class PolicyServer:
+    """
+    Vectorized lookups on a compiled policy.
+
+    On load, the greedy successor of every cell and the number of steps
+    from every cell to the goal are precomputed, so queries are pure
+    array indexing.
+    """
+
+    def __init__(self, path="policy.npz"):
+        data = np.load(path)
+        self.actions = data["actions"]
+        self.grid_size = int(data["grid_size"])
+        self.seed = int(data["seed"])
+        self.start = tuple(int(x) for x in data["start"])
+        self.goal = tuple(int(x) for x in data["goal"])
+        self.obstacles = data["obstacles"]
+
+        self.next_cell = self._successors()
+        self.path_length = self._path_lengths()
+
+    def _successors(self):
+        """Flat index of the cell reached from each cell by its greedy action."""
+        n = self.grid_size
+        rows, cols = np.indices((n, n))
+        moves = ACTION_EFFECTS[self.actions]
+        next_rows = np.clip(rows + moves[..., 0], 0, n - 1)
+        next_cols = np.clip(cols + moves[..., 1], 0, n - 1)
+
+        # Walking into an obstacle leaves the agent in place (see GridWorldEnv.step)
+        blocked = np.zeros((n, n), dtype=bool)
+        if len(self.obstacles):
+            blocked[self.obstacles[:, 0], self.obstacles[:, 1]] = True
+        stay = blocked[next_rows, next_cols]
+        next_rows[stay] = rows[stay]
+        next_cols[stay] = cols[stay]
+
+        next_cell = (next_rows * n + next_cols).ravel().astype(np.int32)
+        goal = self.goal[0] * n + self.goal[1]
+        next_cell[goal] = goal  # Episode ends at the goal
+        return next_cell
+
+    def _path_lengths(self):
+        """Steps to the goal from every cell, UNREACHABLE if the greedy walk loops."""
+        goal = self.goal[0] * self.grid_size + self.goal[1]
+        lengths = np.full(self.next_cell.shape, UNREACHABLE, dtype=np.int32)
+        lengths[goal] = 0
+
+        # Propagate backwards from the goal one step per pass
+        while True:
+            known = lengths[self.next_cell]
+            update = (lengths == UNREACHABLE) & (known != UNREACHABLE)
+            if not update.any():
+                break
+            lengths[update] = known[update] + 1
+
+        return lengths.reshape(self.grid_size, self.grid_size)
+
+    def next_action(self, rows, cols):
+        """Greedy action for each (row, col) pair."""
+        return self.actions[rows, cols]
+
+    def steps_to_goal(self, rows, cols):
+        return self.path_length[rows, cols]
+
+    def paths(self, rows, cols):
+        """
+        Greedy path from each (row, col) to the goal.
+
+        All walks advance together, one vectorized step per iteration.
+        Paths that never reach the goal are returned empty.
+
+        Returns:
+            List of (length + 1, 2) arrays of (row, col) positions
+        """
+        n = self.grid_size
+        cells = np.asarray(rows) * n + np.asarray(cols)
+        lengths = self.path_length.ravel()[cells]
+        longest = int(lengths.max(initial=0))
+
+        steps = np.empty((longest + 1, len(cells)), dtype=np.int32)
+        steps[0] = cells
+        for i in range(longest):
+            steps[i + 1] = self.next_cell[steps[i]]
+
+        result = []
+        for j, length in enumerate(lengths):
+            if length == UNREACHABLE:
+                result.append(np.empty((0, 2), dtype=np.int32))
+            else:
+                walk = steps[:length + 1, j]
+                result.append(np.stack([walk // n, walk % n], axis=1))
+        return result
+
+
+# ---------------------------
+# HTTP API
+# ---------------------------
+
+def make_handler(server):
+    class PolicyHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            path = urlparse(self.path).path
+            if path not in ("/actions", "/paths"):
+                return self._send(404, {"error": "not_found"})
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length))
+                if not isinstance(body, dict):
+                    raise ValueError("expected a JSON object")
+                values = np.asarray(body["cells"], dtype=np.float64).reshape(-1, 2)
+                # Reject e.g. [[0.5, 1]] instead of silently truncating it
+                if not np.all(values == np.floor(values)):
+                    raise ValueError("cell coordinates must be integers")
+                cells = values.astype(np.int64)
+                if ((cells < 0) | (cells >= server.grid_size)).any():
+                    raise ValueError("cell outside the grid")
+            except (KeyError, TypeError, ValueError, json.JSONDecodeError) as e:
+                return self._send(400, {"error": "invalid_request", "detail": str(e)})
+
+            rows, cols = cells[:, 0], cells[:, 1]
+            if path == "/actions":
+                return self._send(200, {
+                    "actions": server.next_action(rows, cols).tolist(),
+                    "steps_to_goal": server.steps_to_goal(rows, cols).tolist(),
+                })
+            self._send(200, {"paths": [p.tolist() for p in server.paths(rows, cols)]})
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return PolicyHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile q_table.npy into policy.npz and optionally serve it.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed the Q-table was trained with (obstacle layout)")
+    parser.add_argument("--num-obstacles", type=int, default=3, help="Obstacles the Q-table was trained with")
+    parser.add_argument("--serve", action="store_true", help="Serve the policy over HTTP on port 8081")
+    args = parser.parse_args()
+
+    # Compile the trained Q-table
+    try:
+        q_table = np.load("q_table.npy")
+    except FileNotFoundError:
+        print("\n❌ Q-table not found. Please run training.py first!")
+        exit(1)
+
+    compile_policy(q_table, grid_size=q_table.shape[0], num_obstacles=args.num_obstacles, seed=args.seed)
+    server = PolicyServer("policy.npz")
+
+    print("\n" + "=" * 50)
+    print("COMPILED POLICY")
+    print("=" * 50)
+    print(f"Action grid: {server.actions.shape} {server.actions.dtype} ({server.actions.nbytes} bytes)")
+    path = server.paths([server.start[0]], [server.start[1]])[0]
+    print(f"Greedy path from start: {[tuple(int(x) for x in p) for p in path]}")
+
+    # Batched lookup latency
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, server.grid_size, 1_000_000)
+    cols = rng.integers(0, server.grid_size, 1_000_000)
+    begin = time.perf_counter()
+    server.next_action(rows, cols)
+    elapsed = time.perf_counter() - begin
+    print(f"Batched next_action: {elapsed / len(rows) * 1e9:.1f} ns/query (1M queries)")
+    print("=" * 50)
+
+    if args.serve:
+        httpd = ThreadingHTTPServer(("0.0.0.0", 8081), make_handler(server))
+        print("Policy API listening on http://0.0.0.0:8081 (POST /actions, POST /paths)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
@@ -0,0 +1,55 @@
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Fixed-size ring buffer of transitions (s, a, r, s', done).
+
+    All storage is preallocated NumPy arrays, so adding a transition is a
+    handful of index writes and sampling a batch is a single fancy-index
+    per field. Once full, the oldest transitions are overwritten.
+    """
+
+    def __init__(self, capacity, state_shape=(2,), state_dtype=np.int32, seed=None):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+
+        self.states = np.zeros((capacity, *state_shape), dtype=state_dtype)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float64)
+        self.next_states = np.zeros((capacity, *state_shape), dtype=state_dtype)
+        self.dones = np.zeros(capacity, dtype=np.bool_)
+
+        self.position = 0  # Next slot to write
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        """Store one transition, overwriting the oldest when full."""
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size):
+        """
+        Sample a batch of transitions uniformly (with replacement).
+
+        Returns:
+            Tuple of arrays (states, actions, rewards, next_states, dones)
+        """
+        idx = self.rng.integers(0, self.size, size=batch_size)
+        return (
+            self.states[idx],
+            self.actions[idx],
+            self.rewards[idx],
+            self.next_states[idx],
+            self.dones[idx],
+        )
@@ -1,8 +1,17 @@
+import sys
+from pathlib import Path
+
 import numpy as np
 import gymnasium as gym
 import matplotlib.pyplot as plt
 import setup
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # Shared profiling.py
+import profiling
+from profiling import phase
+from replay import ReplayBuffer
+from metrics import TrainingMetrics
+
 
 def choose_action(state, q_table, epsilon, env):
     """
@@ -19,13 +28,35 @@ def choose_action(state, q_table, epsilon, env):
     return np.argmax(q_table[row, col])  # Greedy exploitation
 
 
+def planning_update(q_table, batch, alpha, gamma):
+    """
+    Vectorized Q-learning update on a batch of remembered transitions.
+
+    Same rule as the real-step update, applied to all sampled (s, a) pairs
+    at once. Duplicate pairs in one batch are updated once (fancy-index
+    assignment is buffered), which keeps large batches stable.
+    """
+    states, actions, rewards, next_states, dones = batch
+    rows, cols = states[:, 0], states[:, 1]
+    next_rows, next_cols = next_states[:, 0], next_states[:, 1]
+
+    # Terminal transitions have no future value
+    future = np.max(q_table[next_rows, next_cols, :], axis=1) * ~dones
+    td_error = rewards + gamma * future - q_table[rows, cols, actions]
+    q_table[rows, cols, actions] += alpha * td_error
+
+
 def train_q_learning(
     episodes=1000,
     alpha=0.1,
     gamma=0.9,
     epsilon=0.1,
     grid_size=5,
-    seed=42
+    seed=42,
+    planning_steps=0,
+    replay_capacity=10_000,
+    metrics_file="training_metrics.npz",
+    convergence_length=None
 ):
     """
     Train Q-learning agent in Grid World.
@@ -37,16 +68,27 @@ def train_q_learning(
         epsilon: Exploration rate
         grid_size: Size of the grid
         seed: Random seed for reproducibility
+        planning_steps: Dyna-Q planning updates per real step (0 = plain Q-learning)
+        replay_capacity: Size of the transition ring buffer used for planning
+        metrics_file: Where downsampled reward/length curves are written
+        convergence_length: Rolling (100-episode) average length that counts as
+            converged (default: 1.25 × the obstacle-free shortest path)
 
     Returns:
-        Trained Q-table
+        Trained Q-table, TrainingMetrics
     """
     # Create environment
     env = gym.make("GridWorld-v0", grid_size=grid_size, num_obstacles=3, seed=seed)
+    # Seed exploration too, so runs with the same seed are reproducible
+    env.action_space.seed(seed)
+    np.random.seed(seed)
 
     # Initialize Q-table: (grid_size x grid_size x 4 actions)
     q_table = np.zeros((grid_size, grid_size, 4))
 
+    # Dyna-Q: remembered transitions act as a model of the (deterministic) grid
+    replay = ReplayBuffer(replay_capacity, seed=seed) if planning_steps > 0 else None
+
     print("\n" + "=" * 50)
     print("TRAINING Q-LEARNING AGENT")
     print("=" * 50)
@@ -54,15 +96,19 @@ def train_q_learning(
     print(f"Learning rate (α): {alpha}")
     print(f"Discount factor (γ): {gamma}")
     print(f"Exploration rate (ε): {epsilon}")
+    print(f"Planning steps (Dyna-Q): {planning_steps}")
     print("=" * 50)
 
-    episode_rewards = []
-    episode_lengths = []
+    metrics = TrainingMetrics(metrics_file)
     progress_lines = []
+    env_steps = 0
+    converged_at = None  # (episode, env steps) when the rolling length first hit the threshold
+    if convergence_length is None:
+        convergence_length = 1.25 * 2 * (grid_size - 1)
 
     for episode in range(episodes):
         state, _ = env.reset()
-        state = (state * (grid_size - 1)).astype(int)  # Denormalize: [0,1] → grid coords
+        state = (state * (grid_size - 1)).round().astype(int)  # Denormalize: [0,1] → grid coords
 
         total_reward = 0
         done = False
@@ -72,40 +118,60 @@ def train_q_learning(
             action = choose_action(state, q_table, epsilon, env)
 
             # Take action
-            next_state, reward, terminated, truncated, _ = env.step(action)
-            next_state = (next_state * (grid_size - 1)).astype(int)  # Denormalize: [0,1] → grid coords
+            with phase("env_step"):
+                next_state, reward, terminated, truncated, _ = env.step(action)
+            next_state = (next_state * (grid_size - 1)).round().astype(int)  # Denormalize: [0,1] → grid coords
 
             # Q-learning update rule (off-policy)
             # Q(s,a) ← Q(s,a) + α[r + γ max_a' Q(s',a') - Q(s,a)]
             row, col = state
             next_row, next_col = next_state
 
-            q_table[row, col, action] += alpha * (
-                reward + gamma * np.max(q_table[next_row, next_col, :]) - q_table[row, col, action]
-            )
+            with phase("q_update"):
+                q_table[row, col, action] += alpha * (
+                    reward + gamma * np.max(q_table[next_row, next_col, :]) - q_table[row, col, action]
+                )
+
+            # Dyna-Q planning: k extra updates from remembered experience
+            if replay is not None:
+                with phase("planning"):
+                    replay.add(state, action, reward, next_state, terminated)
+                    planning_update(q_table, replay.sample(planning_steps), alpha, gamma)
 
             state = next_state
             total_reward += reward
             done = terminated or truncated
 
-        episode_rewards.append(total_reward)
-        episode_lengths.append(env.unwrapped.step_counter)
+        metrics.record(total_reward, env.unwrapped.step_counter)
+        env_steps += env.unwrapped.step_counter
+
+        window_full = metrics.lengths.count == metrics.lengths.window
+        if converged_at is None and window_full and metrics.lengths.mean <= convergence_length:
+            converged_at = (episode + 1, env_steps)
 
         if (episode + 1) % 100 == 0:
-            avg_reward = np.mean(episode_rewards[-100:])
-            avg_length = np.mean(episode_lengths[-100:])
             progress_lines.append(
                 f"Episode {episode + 1}/{episodes} | "
-                f"Avg Reward: {avg_reward:.2f} | "
-                f"Avg Length: {avg_length:.2f}"
+                f"Avg Reward: {metrics.rewards.mean:.2f} | "
+                f"Avg Length: {metrics.lengths.mean:.2f}"
             )
 
     env.close()
+    metrics.close()
 
     # Print all progress lines at the end
     print()
     for line in progress_lines:
         print(line)
+    print(f"Total environment steps: {env_steps}")
+    if converged_at:
+        print(f"Converged (avg length ≤ {convergence_length:.1f}) after "
+              f"{converged_at[0]} episodes / {converged_at[1]} environment steps")
+    else:
+        print(f"Not converged (avg length ≤ {convergence_length:.1f} never reached)")
+    summary = metrics.summary()
+    print(f"Episode length p50/p90/p99: "
+          f"{summary['length_p50']:.1f} / {summary['length_p90']:.1f} / {summary['length_p99']:.1f}")
 
     # Save Q-table
     np.save("q_table.npy", q_table)
@@ -113,27 +179,37 @@ def train_q_learning(
     print("✅ Training complete! Q-table saved to 'q_table.npy'")
     print("=" * 50)
 
-    return q_table, episode_rewards, episode_lengths
+    return q_table, metrics
 
 
-def plot_results(episode_rewards, episode_lengths):
+def plot_results(metrics_file="training_metrics.npz", output_file="training_results.png"):
     """
-    Plot training results with moving average.
+    Plot training results from downsampled curves.
+
+    Reads the fixed-size file written by TrainingMetrics, so plotting cost
+    does not depend on the number of episodes.
 
     Creates two subplots:
     - Left: Episode rewards over time
     - Right: Episode length (steps) over time
+
+    Args:
+        metrics_file: File written by TrainingMetrics
+        output_file: Where the figure is saved
     """
+    data = np.load(metrics_file)
+    names = list(data["names"])
+    window = int(data["window"])
+    # Centre each bucket on the episodes it covers
+    x = data["episode"] + (data["count"] - 1) / 2
+
     fig, axes = plt.subplots(1, 2, figsize=(14, 5))
 
-    # Plot rewards
-    axes[0].plot(episode_rewards, alpha=0.3, label='Episode Reward')
-    # Moving average smooths the noisy reward signal
-    window = 50
-    if len(episode_rewards) >= window:
-        moving_avg = np.convolve(episode_rewards, np.ones(window) / window, mode='valid')
-        axes[0].plot(range(window - 1, len(episode_rewards)), moving_avg,
-                     label=f'{window}-Episode Moving Average', linewidth=2)
+    # Plot rewards: min/max envelope, bucket mean and moving average
+    i, avg = names.index("reward"), names.index("reward_avg")
+    axes[0].fill_between(x, data["min"][:, i], data["max"][:, i], alpha=0.15, label='Min/Max')
+    axes[0].plot(x, data["mean"][:, i], alpha=0.3, label='Episode Reward')
+    axes[0].plot(x, data["mean"][:, avg], label=f'{window}-Episode Moving Average', linewidth=2)
     axes[0].set_xlabel('Episode')
     axes[0].set_ylabel('Total Reward')
     axes[0].set_title('Training Rewards')
@@ -141,11 +217,10 @@ def plot_results(episode_rewards, episode_lengths):
     axes[0].grid(True, alpha=0.3)
 
     # Plot episode lengths
-    axes[1].plot(episode_lengths, alpha=0.3, label='Episode Length')
-    if len(episode_lengths) >= window:
-        moving_avg = np.convolve(episode_lengths, np.ones(window) / window, mode='valid')
-        axes[1].plot(range(window - 1, len(episode_lengths)), moving_avg,
-                     label=f'{window}-Episode Moving Average', linewidth=2)
+    i, avg = names.index("length"), names.index("length_avg")
+    axes[1].fill_between(x, data["min"][:, i], data["max"][:, i], alpha=0.15, label='Min/Max')
+    axes[1].plot(x, data["mean"][:, i], alpha=0.3, label='Episode Length')
+    axes[1].plot(x, data["mean"][:, avg], label=f'{window}-Episode Moving Average', linewidth=2)
     axes[1].set_xlabel('Episode')
     axes[1].set_ylabel('Steps')
     axes[1].set_title('Episode Length')
@@ -153,13 +228,15 @@ def plot_results(episode_rewards, episode_lengths):
     axes[1].grid(True, alpha=0.3)
 
     plt.tight_layout()
-    plt.savefig('training_results.png', dpi=150, bbox_inches='tight')
-    print("\n✅ Training plot saved to 'training_results.png'")
+    plt.savefig(output_file, dpi=150, bbox_inches='tight')
+    print(f"\n✅ Training plot saved to '{output_file}'")
     plt.close()
 
 
 if __name__ == "__main__":
-    q_table, rewards, lengths = train_q_learning(
+    profiling.start("training")
+
+    q_table, metrics = train_q_learning(
         episodes=1000,
         alpha=0.1,
         gamma=0.95,
@@ -169,4 +246,4 @@ if __name__ == "__main__":
     )
 
     # Plot results
-    plot_results(rewards, lengths)
+    plot_results(metrics.path)
@@ -0,0 +1,232 @@
+"""
+Opt-in profiling for the lesson entry points.
+
+Enable with an environment variable or a command line flag, no code edits:
+
+    AGENT_PROFILE=cprofile python training.py     # deterministic, cProfile
+    AGENT_PROFILE=sample python training.py       # statistical stack sampling
+    AGENT_PROFILE=phases python training.py       # only per-phase timers
+    AGENT_PROFILE_MEMORY=1 python main.py         # tracemalloc snapshot
+    python training.py --profile=sample --profile-memory
+
+Reports are written to AGENT_PROFILE_DIR (default `profiles/`) at exit:
+- `<name>.prof`             cProfile stats (snakeviz, pstats)
+- `<name>.<mode>.folded`    collapsed stacks for flamegraph.pl / speedscope
+- `<name>.phases.folded`    per-phase self time as collapsed stacks (µs)
+- `<name>.tracemalloc.txt`  top allocation sites
+"""
+import atexit
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+_NULL = nullcontext()
+_enabled = False
+_phase_totals = defaultdict(lambda: [0, 0.0])  # "outer;inner" → [calls, seconds]
+_phase_lock = threading.Lock()
+_phase_stack = threading.local()
+
+
+def phase(name):
+    """
+    Time a block as a named phase, e.g. `with phase("env_step"): ...`.
+
+    Nested phases are recorded as "outer;inner". The printed table shows
+    inclusive time; `.phases.folded` holds self time, since flame graph tools
+    add children to their parent. When profiling is off this returns a shared
+    no-op context, so it is cheap enough for inner loops.
+    """
+    if not _enabled:
+        return _NULL
+    return _timed_phase(name)
+
+
+@contextmanager
+def _timed_phase(name):
+    stack = getattr(_phase_stack, "names", None)
+    if stack is None:
+        stack = _phase_stack.names = []
+    stack.append(name)
+    key = ";".join(stack)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        with _phase_lock:
+            entry = _phase_totals[key]
+            entry[0] += 1
+            entry[1] += elapsed
+
+
+def start(name):
+    """
+    Start profiling the current process if requested via env or CLI flags.
+
+    Call once at the top of an entry point. Reports are written at exit.
+    """
+    global _enabled
+
+    mode, memory = _read_flags()
+    if not mode and not memory:
+        return
+
+    _enabled = True
+    out_dir = os.environ.get("AGENT_PROFILE_DIR", "profiles")
+
+    profiler = None
+    sampler = None
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif mode == "sample":
+        interval = float(os.environ.get("AGENT_PROFILE_INTERVAL", "0.005"))
+        sampler = _StackSampler(interval)
+        sampler.start()
+    elif mode not in ("phases", None):
+        print(f"Warning: unknown profile mode '{mode}', only phase timers are enabled.")
+
+    if memory:
+        tracemalloc.start(25)
+
+    atexit.register(_write_reports, name, out_dir, profiler, sampler, memory)
+    print(f"Profiling enabled ({mode or 'memory'}), reports go to '{out_dir}/{name}.*'")
+
+
+def _read_flags():
+    mode = os.environ.get("AGENT_PROFILE") or None
+    memory = os.environ.get("AGENT_PROFILE_MEMORY", "") not in ("", "0")
+
+    # CLI flags override env and are removed so scripts never see them
+    remaining = []
+    for arg in sys.argv[1:]:
+        if arg == "--profile":
+            mode = "cprofile"
+        elif arg.startswith("--profile="):
+            mode = arg.split("=", 1)[1]
+        elif arg == "--profile-memory":
+            memory = True
+        else:
+            remaining.append(arg)
+    sys.argv[1:] = remaining
+
+    return mode, memory
+
+
+class _StackSampler(threading.Thread):
+    """
+    Samples every thread's Python stack at a fixed interval.
+
+    Stacks are rooted at the thread name, so work done in executor threads
+    (e.g. LangGraph nodes) is kept apart from the main thread.
+    """
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.counts = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(_frame_label(code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)).replace(" ", "_").replace(";", ":"))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _frame_label(filename, lineno, funcname):
+    # ';' and ' ' separate frames and counts in the collapsed format
+    label = f"{funcname} ({os.path.basename(filename)}:{lineno})"
+    return label.replace(";", ":").replace(" ", "_")
+
+
+def _write_reports(name, out_dir, profiler, sampler, memory):
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, name)
+    written = []
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(f"{base}.prof")
+        _write_folded(f"{base}.cprofile.folded", _cprofile_folded(profiler))
+        written += [f"{base}.prof", f"{base}.cprofile.folded"]
+
+    if sampler is not None:
+        sampler.stop()
+        _write_folded(f"{base}.sample.folded", sampler.counts)
+        written.append(f"{base}.sample.folded")
+
+    if memory:
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        with open(f"{base}.tracemalloc.txt", "w") as f:
+            for stat in snapshot.statistics("lineno")[:25]:
+                f.write(f"{stat}\n")
+        written.append(f"{base}.tracemalloc.txt")
+
+    if _phase_totals:
+        _write_folded(f"{base}.phases.folded", _phase_self_times(_phase_totals))
+        written.append(f"{base}.phases.folded")
+
+        print("\n" + "=" * 50)
+        print(f"PROFILE PHASES ({name})")
+        print("=" * 50)
+        for key, (calls, seconds) in sorted(_phase_totals.items(), key=lambda kv: -kv[1][1]):
+            print(f"{key:<30} calls={calls:<8} total={seconds:.3f}s avg={seconds / calls * 1e6:.1f}µs")
+        print("=" * 50)
+
+    for path in written:
+        print(f"Profile written to '{path}'")
+
+
+def _phase_self_times(totals):
+    """Phase time minus the time of its direct children (µs), as collapsed stacks expect."""
+    self_times = {key: seconds for key, (_, seconds) in totals.items()}
+    for key, (_, seconds) in totals.items():
+        parent = key.rpartition(";")[0]
+        if parent in self_times:
+            self_times[parent] -= seconds
+    return {key: round(max(seconds, 0.0) * 1e6) for key, seconds in self_times.items()}
+
+
+def _cprofile_folded(profiler):
+    """
+    Caller → callee edges from cProfile as two-frame collapsed stacks.
+
+    cProfile does not keep full stacks, so each line is "caller;callee"
+    weighted by the callee's own time spent under that caller (µs).
+    """
+    folded = Counter()
+    for func, (_, _, tottime, _, callers) in pstats.Stats(profiler).stats.items():
+        callee = _frame_label(*func)
+        if not callers:
+            folded[callee] += int(tottime * 1e6)
+        for caller, (_, _, caller_tottime, _) in callers.items():
+            folded[f"{_frame_label(*caller)};{callee}"] += int(caller_tottime * 1e6)
+    return folded
+
+
+def _write_folded(path, counts):
+    with open(path, "w") as f:
+        for stack, value in sorted(counts.items()):
+            if value > 0:
+                f.write(f"{stack} {value}\n")
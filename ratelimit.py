@@ -0,0 +1,283 @@
+"""
+Client-side rate limiting and retries for OpenAI calls.
+
+One scheduler per process gates every model call:
+- token buckets for requests/minute and tokens/minute
+- adaptive concurrency (AIMD): +1/limit per success, halved on 429 at most
+  once per window (429s for requests sent before the last cut are ignored)
+- buckets re-synced from `x-ratelimit-*` response headers
+- jittered exponential retries that honour `retry-after`
+- priority queue, interactive calls go before batch calls
+
+Configure with OPENAI_RPM, OPENAI_TPM and OPENAI_MAX_CONCURRENCY.
+`test_ratelimit.py` exercises it against a local mock endpoint that
+answers with 429s.
+"""
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+INTERACTIVE = 0
+BATCH = 1
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class TokenBucket:
+    """Refills at `rate` units per second up to `capacity`. Not thread-safe."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= amount
+
+    def sync(self, remaining, now):
+        """Trust the server: never assume more budget than it reports."""
+        self._refill(now)
+        self.level = min(self.level, remaining)
+
+
+class RateLimitScheduler:
+    """
+    Gate for API calls with rate limits, adaptive concurrency and retries.
+
+    `call(fn)` waits for a slot, runs `fn()` which must return
+    `(result, response_headers)`, and retries throttled or failed calls.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute=500,
+        tokens_per_minute=200_000,
+        max_concurrency=16,
+        initial_concurrency=4,
+        max_retries=6,
+        base_delay=0.5,
+        max_delay=30.0,
+        retry_on=()
+    ):
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(initial_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = (ConnectionError, TimeoutError) + tuple(retry_on)
+
+        self.stats = Counter()
+        self._cond = threading.Condition()
+        self._queue = []  # Heap of (priority, seq)
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._epoch = 0  # Bumped on every concurrency decrease
+
+    def call(self, fn, tokens=1, priority=INTERACTIVE):
+        """
+        Run `fn` under the rate limits.
+
+        Args:
+            fn: Callable returning (result, headers)
+            tokens: Estimated tokens used by the request (prompt + completion)
+            priority: INTERACTIVE or BATCH (lower runs first)
+
+        Returns:
+            The result of `fn`. Raises the last error once retries are exhausted.
+        """
+        # Retries keep their original place in the queue
+        ticket = (priority, next(self._seq))
+
+        for attempt in itertools.count():
+            epoch = self._acquire(ticket, tokens)
+            try:
+                result, headers = fn()
+            except Exception as exc:
+                status, headers = _error_info(exc)
+                retry = attempt < self.max_retries and self._is_retryable(exc, status)
+                outcome = "throttled" if status == 429 else "error"
+                self._release(headers, epoch, outcome, "retries" if retry else "failed")
+                if not retry:
+                    raise
+                time.sleep(self._retry_delay(attempt, headers))
+                continue
+
+            self._release(headers, epoch, "ok", "ok")
+            return result
+
+    def _acquire(self, ticket, tokens):
+        """Wait for a slot; returns the concurrency epoch the request was admitted in."""
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None  # Not at the head or no free slot: wait for a release
+                    if self._queue[0] == ticket and self._in_flight < max(1, int(self.concurrency)):
+                        wait = max(
+                            self._paused_until - now,
+                            self.requests.wait_time(1, now),
+                            self.tokens.wait_time(tokens, now),
+                        )
+                        if wait <= 0:
+                            break
+                    self._cond.wait(wait)
+            except BaseException:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                raise
+
+            heapq.heappop(self._queue)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self._in_flight += 1
+            self._cond.notify_all()  # Let the next ticket re-check
+            return self._epoch
+
+    def _release(self, headers, epoch, outcome, stat):
+        """
+        Free the slot and adapt concurrency.
+
+        Args:
+            headers: Response headers (may be empty)
+            epoch: Value returned by `_acquire` for this request
+            outcome: "ok", "throttled" (429) or "error" (5xx, connection errors...)
+            stat: Counter in `stats` to increment
+        """
+        headers = _normalize(headers)
+        with self._cond:
+            now = time.monotonic()
+            self._in_flight -= 1
+            self.stats[stat] += 1
+
+            # AIMD: halve once per burst of 429s, grow by ~1 per window of successes.
+            # Other errors say nothing about our rate and leave concurrency alone.
+            if outcome == "throttled":
+                self.stats["throttled"] += 1
+                if epoch == self._epoch:
+                    # Requests admitted before this cut will 429 too, don't cut again for them
+                    self.concurrency = max(1.0, self.concurrency / 2)
+                    self._epoch += 1
+                retry_after = _retry_after(headers)
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+            elif outcome == "ok":
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+            self._apply_headers(headers, now)
+            self._cond.notify_all()
+
+    def _apply_headers(self, headers, now):
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            limit = _to_number(headers.get(f"x-ratelimit-limit-{kind}"))
+            if limit:
+                # Limits are per minute
+                bucket.capacity = limit
+                bucket.rate = limit / 60
+
+            remaining = _to_number(headers.get(f"x-ratelimit-remaining-{kind}"))
+            if remaining is not None:
+                bucket.sync(remaining, now)
+                reset = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining <= 0 and reset:
+                    self._paused_until = max(self._paused_until, now + reset)
+
+    def _is_retryable(self, exc, status):
+        if status is not None:
+            return status == 429 or status >= 500
+        return isinstance(exc, self.retry_on)
+
+    def _retry_delay(self, attempt, headers):
+        # Full jitter spreads retries of many clients throttled at once
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = _retry_after(_normalize(headers))
+        return max(backoff, retry_after + random.uniform(0, self.base_delay)) if retry_after else backoff
+
+
+def estimate_tokens(messages, max_completion_tokens=512):
+    """Rough token estimate (~4 characters per token) used to reserve budget."""
+    prompt = sum(len(str(_content(m))) for m in messages) // 4 + 4 * len(messages)
+    return prompt + max_completion_tokens
+
+
+def _content(message):
+    if isinstance(message, dict):
+        return message.get("content") or message.get("tool_calls") or ""
+    if isinstance(message, tuple):
+        return message[-1]
+    return getattr(message, "content", message)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(**overrides):
+    """Process-wide scheduler, created on first use from env and `overrides`."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            settings = {
+                "requests_per_minute": int(os.environ.get("OPENAI_RPM", "500")),
+                "tokens_per_minute": int(os.environ.get("OPENAI_TPM", "200000")),
+                "max_concurrency": int(os.environ.get("OPENAI_MAX_CONCURRENCY", "16")),
+            }
+            settings.update(overrides)
+            _scheduler = RateLimitScheduler(**settings)
+        return _scheduler
+
+
+def _error_info(exc):
+    """Extract (HTTP status, headers) from openai, httpx or urllib errors."""
+    status = getattr(exc, "status_code", None)
+    if status is None and isinstance(getattr(exc, "code", None), int):
+        status = exc.code  # urllib.error.HTTPError
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None) or {}
+    return status, headers
+
+
+def _normalize(headers):
+    return {str(k).lower(): v for k, v in dict(headers or {}).items()}
+
+
+def _retry_after(headers):
+    if "retry-after-ms" in headers:
+        return (_to_number(headers["retry-after-ms"]) or 0) / 1000
+    return _to_number(headers.get("retry-after")) or 0
+
+
+def _to_number(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_duration(value):
+    """Parse OpenAI reset durations such as '1s', '6m0s' or '20ms'."""
+    if not value:
+        return None
+    return sum(float(n) * _UNIT_SECONDS[unit] for n, unit in _DURATION.findall(str(value)))
@@ -0,0 +1,193 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ratelimit import BATCH, INTERACTIVE, RateLimitScheduler, TokenBucket
+
+
+class MockEndpoint:
+    """
+    Local chat-completions stand-in that pushes back with 429s.
+
+    Requests are served from a `server_rps` token bucket holding up to `burst`
+    requests; `status` forces every response to that status code instead
+    (e.g. 400, or 429 forever).
+    """
+
+    def __init__(self, server_rps=20, burst=None, status=None):
+        self.bucket = TokenBucket(server_rps, burst or server_rps)
+        self.server_rps = server_rps
+        self.status = status
+        self.served = Counter()
+        self.lock = threading.Lock()
+
+        endpoint = self
+
+        class MockHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with endpoint.lock:
+                    status = endpoint.status
+                    if status is None:
+                        allowed = endpoint.bucket.wait_time(1, time.monotonic()) == 0
+                        if allowed:
+                            endpoint.bucket.take(1)
+                        status = 200 if allowed else 429
+                    remaining = int(endpoint.bucket.level)
+                    endpoint.served[status] += 1
+
+                body = json.dumps({"ok": status == 200}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("x-ratelimit-limit-requests", str(endpoint.server_rps * 60))
+                self.send_header("x-ratelimit-remaining-requests", str(remaining))
+                self.send_header("x-ratelimit-reset-requests", f"{1 / endpoint.server_rps:.3f}s")
+                if status == 429:
+                    self.send_header("retry-after-ms", str(int(1000 / endpoint.server_rps)))
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/chat/completions"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def send(self):
+        request = urllib.request.Request(self.url, data=b"{}", method="POST")
+        with urllib.request.urlopen(request) as resp:
+            return json.load(resp), resp.headers
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def endpoint():
+    endpoints = []
+
+    def start(**kwargs):
+        endpoints.append(MockEndpoint(**kwargs))
+        return endpoints[-1]
+
+    yield start
+    for e in endpoints:
+        e.close()
+
+
+def test_every_request_eventually_succeeds(endpoint):
+    # The first wave of 10 concurrent requests overflows the burst of 2
+    mock = endpoint(server_rps=20, burst=2)
+    # Deliberately optimistic client limits: the server has to push back
+    scheduler = RateLimitScheduler(
+        requests_per_minute=6000, max_concurrency=10, initial_concurrency=10, base_delay=0.05, max_retries=10
+    )
+
+    with ThreadPoolExecutor(10) as pool:
+        priorities = [INTERACTIVE if i % 4 == 0 else BATCH for i in range(40)]
+        futures = [pool.submit(scheduler.call, mock.send, 1, p) for p in priorities]
+        results = [f.result() for f in futures]
+
+    assert results == [{"ok": True}] * 40
+    assert mock.served[200] == 40
+    assert mock.served[429] > 0  # The server did push back
+    assert scheduler.stats["ok"] == 40
+    assert scheduler.stats["throttled"] == mock.served[429]
+
+
+def test_burst_of_429s_halves_concurrency_once(endpoint):
+    mock = endpoint(status=429)
+    scheduler = RateLimitScheduler(max_concurrency=8, initial_concurrency=8, max_retries=0)
+
+    # All 8 requests are admitted before any of them gets its 429 back
+    admitted = threading.Barrier(8)
+
+    def send():
+        admitted.wait(timeout=5)
+        return mock.send()
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(scheduler.call, send) for _ in range(8)]
+        for f in futures:
+            with pytest.raises(urllib.error.HTTPError):
+                f.result()
+
+    assert scheduler.stats["throttled"] == 8
+    assert scheduler.concurrency == 4.0
+
+    # A 429 for a request sent after the cut starts a new window
+    with pytest.raises(urllib.error.HTTPError):
+        scheduler.call(mock.send)
+    assert scheduler.concurrency == 2.0
+
+
+def test_interactive_admitted_before_batch():
+    scheduler = RateLimitScheduler(max_concurrency=1, initial_concurrency=1)
+    holding = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def hold():
+        holding.set()
+        release.wait(timeout=5)
+        return None, {}
+
+    def record(name):
+        order.append(name)
+        return name, {}
+
+    with ThreadPoolExecutor(7) as pool:
+        blocker = pool.submit(scheduler.call, hold)
+        assert holding.wait(timeout=5)
+
+        # Batch tickets are queued first, interactive ones still jump ahead
+        names = ["batch-0", "batch-1", "batch-2", "interactive-0", "interactive-1", "interactive-2"]
+        futures = []
+        for name in names:
+            priority = INTERACTIVE if name.startswith("interactive") else BATCH
+            futures.append(pool.submit(scheduler.call, lambda name=name: record(name), 1, priority))
+            while len(scheduler._queue) < len(futures):
+                time.sleep(0.001)
+
+        release.set()
+        blocker.result()
+        for f in futures:
+            f.result()
+
+    assert order == ["interactive-0", "interactive-1", "interactive-2", "batch-0", "batch-1", "batch-2"]
+
+
+def test_non_retryable_error_raises_immediately(endpoint):
+    mock = endpoint(status=400)
+    scheduler = RateLimitScheduler(max_retries=5)
+
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        scheduler.call(mock.send)
+
+    assert exc_info.value.code == 400
+    assert mock.served[400] == 1
+    assert scheduler.stats["retries"] == 0
+    assert scheduler.stats["failed"] == 1
+
+
+def test_raises_after_max_retries(endpoint):
+    mock = endpoint(server_rps=1000, status=429)
+    scheduler = RateLimitScheduler(max_retries=3, base_delay=0.001)
+
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        scheduler.call(mock.send)
+
+    assert exc_info.value.code == 429
+    assert mock.served[429] == 4  # First attempt + 3 retries
+    assert scheduler.stats["retries"] == 3
+    assert scheduler.stats["failed"] == 1